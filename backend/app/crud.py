@@ -35,3 +35,9 @@ def create_image(db: Session, image: schemas.ImageCreate, project_id: uuid.UUID,
     db.commit()
     db.refresh(db_image)
     return db_image
+
+def get_image_by_file_path(db: Session, project_id: uuid.UUID, file_path: str):
+    return db.query(models.Image).filter(
+        models.Image.project_id == project_id,
+        models.Image.file_path == file_path,
+    ).first()
@@ -3,6 +3,7 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from .database import engine, Base
 from .routers import projects, images, annotations, classes, ai
+from .storage import LocalStorage, get_storage
 import os
 
 # Create tables with retry logic
@@ -40,10 +41,22 @@ app.include_router(annotations.router)
 app.include_router(classes.router)
 app.include_router(ai.router)
 
-# Mount static files
-STORAGE_PATH = os.getenv("STORAGE_PATH", "/data")
-os.makedirs(STORAGE_PATH, exist_ok=True)
-app.mount("/static", StaticFiles(directory=STORAGE_PATH), name="static")
+# Connect to storage with the same retry logic (MinIO may still be starting)
+for i in range(MAX_RETRIES):
+    try:
+        storage = get_storage()
+        print("Storage backend ready.")
+        break
+    except Exception as e:
+        if i == MAX_RETRIES - 1:
+            print(f"Failed to connect to storage after {MAX_RETRIES} attempts.")
+            raise e
+        print(f"Storage not ready ({e}). Retrying in {RETRY_DELAY} seconds... ({i+1}/{MAX_RETRIES})")
+        time.sleep(RETRY_DELAY)
+
+# Mount static files (object storage backends serve presigned URLs instead)
+if isinstance(storage, LocalStorage):
+    app.mount("/static", StaticFiles(directory=storage.root), name="static")
 
 @app.get("/health")
 def health_check():
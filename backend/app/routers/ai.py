@@ -2,8 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 from ..database import get_db
+from ..storage import Storage, get_storage, project_key
 import os
-import json
+import shutil
 from pydantic import BaseModel
 from ultralytics import YOLO
 from .. import schemas
@@ -13,8 +14,6 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-STORAGE_PATH = os.getenv("STORAGE_PATH", "/data")
-
 # Initialize Model (Lazy load or global)
 # We might need to reload model if training updates it.
 DEFAULT_MODEL_PATH = "yolov8n.pt"
@@ -30,25 +29,32 @@ class TrainRequest(BaseModel):
 from ..utils.yolo_converter import convert_to_yolo_format
 from ..utils.device_manager import get_device
 
+def _custom_model_key(project_id: str) -> str:
+    return project_key(project_id, "runs", "train", "weights", "best.pt")
+
 @router.post("/projects/{project_id}/train")
-def train_model(project_id: str, request: TrainRequest, db: Session = Depends(get_db)):
+def train_model(
+    project_id: str,
+    request: TrainRequest,
+    db: Session = Depends(get_db),
+    storage: Storage = Depends(get_storage),
+):
     # 1. Get Project Classes
-    project_dir = os.path.join(STORAGE_PATH, str(project_id))
-    classes_file = os.path.join(project_dir, "classes.json")
-    
-    if not os.path.exists(classes_file):
+    try:
+        classes = storage.read_json(project_key(project_id, "classes.json"))
+    except FileNotFoundError:
          raise HTTPException(status_code=400, detail="No classes defined for this project.")
-    
-    with open(classes_file, "r") as f:
-        classes = json.load(f)
         
     if not classes:
         raise HTTPException(status_code=400, detail="Class list is empty.")
 
+    # 2. Get Project Images
+    from ..models import Image
+    images = db.query(Image).filter(Image.project_id == project_id).all()
     image_map = {str(img.id): img.file_path for img in images}
 
     # 3. Convert Data
-    yaml_path = convert_to_yolo_format(project_id, STORAGE_PATH, classes, image_map)
+    yaml_path = convert_to_yolo_format(project_id, storage, classes, image_map)
     if not yaml_path:
         raise HTTPException(status_code=400, detail="Failed to prepare dataset. Are there any labels?")
         
@@ -58,6 +64,7 @@ def train_model(project_id: str, request: TrainRequest, db: Session = Depends(ge
     device = get_device()
     print(f"Starting training on device: {device}")
     
+    runs_dir = storage.work_dir(str(project_id), "runs")
     train_model = YOLO("yolov8n.pt") # Always start from base for Stability? Or previous best? Let's start base.
     
     try:
@@ -66,34 +73,46 @@ def train_model(project_id: str, request: TrainRequest, db: Session = Depends(ge
             epochs=request.epochs, 
             imgsz=request.imgsz, 
             device=device,
-            project=os.path.join(project_dir, "runs"),
+            project=runs_dir,
             name="train",
             exist_ok=True # Overwrite existing experiment 'train' folder
         )
     except Exception as e:
         print(f"Training failed: {e}")
         raise HTTPException(status_code=500, detail=f"Training failed: {str(e)}")
+    finally:
+        # The dataset is a throwaway copy of the project's images and labels
+        shutil.rmtree(os.path.dirname(yaml_path), ignore_errors=True)
         
     # 4. Locate Best Model
-    # It should be in {project_dir}/runs/train/weights/best.pt
-    best_model_path = os.path.join(project_dir, "runs", "train", "weights", "best.pt")
+    # It should be in {runs_dir}/train/weights/best.pt
+    best_model_path = os.path.join(runs_dir, "train", "weights", "best.pt")
     
     if os.path.exists(best_model_path):
-        return {"status": "success", "message": "Training complete", "model_path": best_model_path}
+        # Publish weights so every API node can pick them up for prediction
+        model_key = _custom_model_key(project_id)
+        storage.put_file(model_key, best_model_path)
+        return {"status": "success", "message": "Training complete", "model_path": model_key}
     else:
         # Sometimes file structure varies, let's verify
         return {"status": "warning", "message": "Training finished but model file not found at expected location."}
 
 
 @router.post("/projects/{project_id}/images/{image_id}/predict", response_model=List[schemas.Annotation])
-def predict_objects(project_id: str, image_id: str, db: Session = Depends(get_db)):
-    project_dir = os.path.join(STORAGE_PATH, str(project_id))
-    
-    # Check for custom model
-    custom_model_path = os.path.join(project_dir, "runs", "train", "weights", "best.pt")
-    
+def predict_objects(
+    project_id: str,
+    image_id: str,
+    db: Session = Depends(get_db),
+    storage: Storage = Depends(get_storage),
+):
+    # Check for custom model (fetched through the local storage cache)
     active_model = model
-    if os.path.exists(custom_model_path):
+    try:
+        custom_model_path = storage.cached_path(_custom_model_key(project_id))
+    except FileNotFoundError:
+        custom_model_path = None
+
+    if custom_model_path:
         # We should load this dynamically. 
         # Loading a model takes time, so maybe cache it? 
         # For now, let's load it every time or do a simple cache check.
@@ -104,17 +123,15 @@ def predict_objects(project_id: str, image_id: str, db: Session = Depends(get_db
             print(f"Failed to load custom model, falling back to default: {e}")
             active_model = model
     
-    images_dir = os.path.join(project_dir, "images")
-    
     # Better: Query DB
     from ..models import Image
     image = db.query(Image).filter(Image.id == image_id, Image.project_id == project_id).first()
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
         
-    image_path = os.path.join(images_dir, image.file_path)
-    
-    if not os.path.exists(image_path):
+    try:
+        image_path = storage.cached_path(project_key(project_id, "images", image.file_path))
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Image file missing")
 
     # Run Inference
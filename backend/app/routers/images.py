@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
 from typing import List
 from .. import crud, models, schemas
 from ..database import get_db
-import shutil
+from ..storage import Storage, UploadError, get_storage, project_key, MULTIPART_PART_SIZE
+import math
 import os
 import uuid
 
@@ -12,34 +14,165 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-STORAGE_PATH = os.getenv("STORAGE_PATH", "/data")
+# S3 allows at most 10,000 parts per multipart upload
+MAX_UPLOAD_PARTS = 10000
+
+def _new_file_path(filename: str) -> str:
+    extension = os.path.splitext(filename)[1]
+    return f"{uuid.uuid4()}{extension}"
+
+def _check_file_path(file_path: str):
+    # file_path comes back from the client; only accept names shaped like the ones we issue
+    stem, _ = os.path.splitext(file_path)
+    try:
+        valid = os.path.basename(file_path) == file_path and str(uuid.UUID(stem)) == stem
+    except ValueError:
+        valid = False
+    if not valid:
+        raise HTTPException(status_code=400, detail="Invalid file path")
 
 @router.post("/projects/{project_id}/images", response_model=schemas.Image)
-def upload_image(project_id: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
+def upload_image(
+    project_id: str,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    storage: Storage = Depends(get_storage),
+):
     # Verify project exists
     db_project = crud.get_project(db, project_id=project_id)
     if not db_project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    # Define path
-    file_uuid = uuid.uuid4()
-    extension = os.path.splitext(file.filename)[1]
-    safe_filename = f"{file_uuid}{extension}"
-    project_dir = os.path.join(STORAGE_PATH, str(project_id), "images")
-    file_location = os.path.join(project_dir, safe_filename)
+    safe_filename = _new_file_path(file.filename)
+    key = project_key(project_id, "images", safe_filename)
 
-    # Ensure directory exists (redundancy check)
-    os.makedirs(project_dir, exist_ok=True)
-
-    # Save file
-    with open(file_location, "wb+") as file_object:
-        shutil.copyfileobj(file.file, file_object)
-    
-    # Get file size
-    file_size = os.path.getsize(file_location)
+    # Save file (multipart for large files on S3)
+    storage.put_fileobj(key, file.file, content_type=file.content_type)
+    file_size = storage.size(key)
 
     # Create DB record
     image_data = schemas.ImageCreate(filename=file.filename, file_size=file_size)
     db_image = crud.create_image(db=db, image=image_data, project_id=project_id, file_path=safe_filename)
-    
+
+    return db_image
+
+@router.post("/projects/{project_id}/images/uploads", response_model=schemas.UploadTicket)
+def create_upload(
+    project_id: str,
+    request: schemas.UploadRequest,
+    db: Session = Depends(get_db),
+    storage: Storage = Depends(get_storage),
+):
+    """
+    Starts a direct-to-storage upload. Small files get a single presigned PUT URL,
+    larger ones a multipart upload with one presigned URL per part.
+    Finish with POST /projects/{project_id}/images/uploads/complete.
+    """
+    db_project = crud.get_project(db, project_id=project_id)
+    if not db_project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    if not storage.supports_presigned:
+        return schemas.UploadTicket(direct=False)
+
+    safe_filename = _new_file_path(request.filename)
+    key = project_key(project_id, "images", safe_filename)
+
+    if not request.file_size or request.file_size <= MULTIPART_PART_SIZE:
+        url = storage.presigned_put_url(key, content_type=request.content_type)
+        return schemas.UploadTicket(direct=True, file_path=safe_filename, url=url)
+
+    part_count = math.ceil(request.file_size / MULTIPART_PART_SIZE)
+    if part_count > MAX_UPLOAD_PARTS:
+        raise HTTPException(status_code=400, detail="File too large")
+
+    upload_id = storage.create_multipart_upload(key, content_type=request.content_type)
+    part_urls = [
+        storage.presigned_part_url(key, upload_id, part_number)
+        for part_number in range(1, part_count + 1)
+    ]
+    return schemas.UploadTicket(
+        direct=True,
+        file_path=safe_filename,
+        upload_id=upload_id,
+        part_size=MULTIPART_PART_SIZE,
+        part_urls=part_urls,
+    )
+
+@router.post("/projects/{project_id}/images/uploads/complete", response_model=schemas.Image)
+def complete_upload(
+    project_id: str,
+    request: schemas.UploadComplete,
+    db: Session = Depends(get_db),
+    storage: Storage = Depends(get_storage),
+):
+    db_project = crud.get_project(db, project_id=project_id)
+    if not db_project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    _check_file_path(request.file_path)
+
+    # Each issued name may only be registered once
+    if crud.get_image_by_file_path(db, project_id=project_id, file_path=request.file_path):
+        raise HTTPException(status_code=409, detail="Upload already completed")
+
+    key = project_key(project_id, "images", request.file_path)
+
+    if request.upload_id:
+        if not request.parts:
+            raise HTTPException(status_code=400, detail="No parts uploaded")
+        try:
+            storage.complete_multipart_upload(key, request.upload_id, [p.dict() for p in request.parts])
+        except UploadError as e:
+            print(f"Completing multipart upload failed: {e}")
+            # Keep the parts when the client can fix the request and retry
+            if not e.recoverable:
+                try:
+                    storage.abort_multipart_upload(key, request.upload_id)
+                except Exception as abort_error:
+                    print(f"Aborting multipart upload failed: {abort_error}")
+            raise HTTPException(status_code=400, detail=f"Upload could not be completed: {e}")
+
+    try:
+        file_size = storage.size(key)
+    except FileNotFoundError:
+        raise HTTPException(status_code=400, detail="Uploaded file not found in storage")
+
+    image_data = schemas.ImageCreate(filename=request.filename, file_size=file_size)
+    db_image = crud.create_image(db=db, image=image_data, project_id=project_id, file_path=request.file_path)
+
     return db_image
+
+@router.post("/projects/{project_id}/images/uploads/abort")
+def abort_upload(
+    project_id: str,
+    request: schemas.UploadAbort,
+    storage: Storage = Depends(get_storage),
+):
+    # Lets clients release the stored parts of a multipart upload they gave up on
+    _check_file_path(request.file_path)
+    if not storage.supports_presigned:
+        raise HTTPException(status_code=400, detail="Direct uploads are not supported")
+
+    key = project_key(project_id, "images", request.file_path)
+    try:
+        storage.abort_multipart_upload(key, request.upload_id)
+    except Exception as e:
+        print(f"Aborting multipart upload failed: {e}")
+        raise HTTPException(status_code=400, detail="Upload could not be aborted")
+
+    return {"status": "aborted"}
+
+@router.get("/projects/{project_id}/images/{image_id}/file")
+def get_image_file(
+    project_id: str,
+    image_id: str,
+    db: Session = Depends(get_db),
+    storage: Storage = Depends(get_storage),
+):
+    # Redirect so the browser fetches bytes from storage, not through the API
+    image = db.query(models.Image).filter(models.Image.id == image_id, models.Image.project_id == project_id).first()
+    if not image:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    return RedirectResponse(storage.url(project_key(project_id, "images", image.file_path)))
@@ -3,7 +3,6 @@ from sqlalchemy.orm import Session
 from typing import List
 from .. import crud, models, schemas
 from ..database import get_db
-import os
 
 router = APIRouter(
     prefix="/projects",
@@ -11,16 +10,10 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-STORAGE_PATH = os.getenv("STORAGE_PATH", "/data")
-
 @router.post("/", response_model=schemas.Project)
 def create_project(project: schemas.ProjectCreate, db: Session = Depends(get_db)):
+    # Storage keys are created on first write, no directory setup needed
     db_project = crud.create_project(db=db, project=project)
-    
-    # Create project directory in storage
-    project_path = os.path.join(STORAGE_PATH, str(db_project.id), "images")
-    os.makedirs(project_path, exist_ok=True)
-    
     return db_project
 
 @router.get("/", response_model=List[schemas.Project])
@@ -19,6 +19,35 @@ class Image(ImageBase):
     class Config:
         orm_mode = True
 
+class UploadRequest(BaseModel):
+    filename: str
+    content_type: Optional[str] = None
+    file_size: Optional[int] = None
+
+class UploadTicket(BaseModel):
+    # direct=False means the storage backend can't presign; POST the file to /projects/{id}/images instead
+    direct: bool
+    file_path: Optional[str] = None
+    method: str = "PUT"
+    url: Optional[str] = None
+    upload_id: Optional[str] = None
+    part_size: Optional[int] = None
+    part_urls: List[str] = []
+
+class UploadPart(BaseModel):
+    part_number: int
+    etag: str
+
+class UploadComplete(BaseModel):
+    filename: str
+    file_path: str
+    upload_id: Optional[str] = None
+    parts: List[UploadPart] = []
+
+class UploadAbort(BaseModel):
+    file_path: str
+    upload_id: str
+
 class ProjectBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=50)
     description: Optional[str] = Field(None, max_length=255)
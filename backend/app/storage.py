@@ -0,0 +1,517 @@
+import os
+import json
+import shutil
+import tempfile
+import threading
+from functools import lru_cache
+from typing import BinaryIO, Dict, List, Optional
+
+# Object keys mirror the original on-disk layout, e.g.
+#   {project_id}/images/{file_path}
+#   {project_id}/labels/{image_id}.json
+#   {project_id}/classes.json
+#   {project_id}/runs/train/weights/best.pt
+# so an existing STORAGE_PATH directory keeps working with the local backend.
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+STORAGE_PATH = os.getenv("STORAGE_PATH", "/data")
+STORAGE_CACHE_PATH = os.getenv("STORAGE_CACHE_PATH", "/tmp/opensight-cache")
+PRESIGN_EXPIRES = int(os.getenv("STORAGE_PRESIGN_EXPIRES", "3600"))
+# Upper bound for the S3 read-through cache; least recently used objects are evicted
+STORAGE_CACHE_MAX_BYTES = int(os.getenv("STORAGE_CACHE_MAX_BYTES", str(10 * 1024 ** 3)))
+MULTIPART_PART_SIZE = int(os.getenv("STORAGE_MULTIPART_PART_SIZE", str(8 * 1024 * 1024)))
+
+
+class UploadError(Exception):
+    """
+    A multipart upload could not be completed. recoverable=True means the
+    upload is still open and the client may retry (e.g. with corrected ETags).
+    """
+
+    def __init__(self, message: str, recoverable: bool):
+        super().__init__(message)
+        self.recoverable = recoverable
+
+
+def project_key(project_id, *parts: str) -> str:
+    return "/".join([str(project_id), *parts])
+
+
+class Storage:
+    """
+    Minimal blob store interface used by the routers.
+    Keys are '/'-separated paths relative to the storage root.
+    """
+
+    # Whether clients can transfer bytes directly via presigned URLs.
+    supports_presigned = False
+
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None):
+        raise NotImplementedError
+
+    def put_fileobj(self, key: str, fileobj: BinaryIO, content_type: Optional[str] = None):
+        raise NotImplementedError
+
+    def put_file(self, key: str, path: str):
+        with open(path, "rb") as f:
+            self.put_fileobj(key, f)
+
+    def get_bytes(self, key: str) -> bytes:
+        """Raises FileNotFoundError if the key does not exist."""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def size(self, key: str) -> int:
+        """Raises FileNotFoundError if the key does not exist."""
+        raise NotImplementedError
+
+    def list(self, prefix: str) -> List[str]:
+        """Returns all keys below prefix (recursive)."""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def url(self, key: str) -> str:
+        """URL a browser can GET the object from."""
+        raise NotImplementedError
+
+    def cached_path(self, key: str) -> str:
+        """
+        Local filesystem path holding the object's bytes, for libraries
+        (YOLO, OpenCV) that need a real file. Raises FileNotFoundError.
+        """
+        raise NotImplementedError
+
+    def work_dir(self, *parts: str) -> str:
+        """
+        Local scratch directory for datasets and training runs. Callers remove
+        what they no longer need; nothing here is evicted automatically.
+        """
+        raise NotImplementedError
+
+    # Presigned transfers (only when supports_presigned is True)
+
+    def presigned_put_url(self, key: str, content_type: Optional[str] = None) -> str:
+        raise NotImplementedError
+
+    def create_multipart_upload(self, key: str, content_type: Optional[str] = None) -> str:
+        raise NotImplementedError
+
+    def presigned_part_url(self, key: str, upload_id: str, part_number: int) -> str:
+        raise NotImplementedError
+
+    def complete_multipart_upload(self, key: str, upload_id: str, parts: List[Dict]):
+        """Raises UploadError if the storage rejects the parts."""
+        raise NotImplementedError
+
+    def abort_multipart_upload(self, key: str, upload_id: str):
+        raise NotImplementedError
+
+    # JSON helpers
+
+    def read_json(self, key: str):
+        return json.loads(self.get_bytes(key))
+
+    def write_json(self, key: str, data):
+        self.put_bytes(key, json.dumps(data).encode("utf-8"), content_type="application/json")
+
+
+class LocalStorage(Storage):
+    """Stores objects as plain files below a root directory (served at /static)."""
+
+    def __init__(self, root: str, static_url: str = "/static"):
+        self.root = os.path.abspath(root)
+        self.static_url = static_url.rstrip("/")
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, *key.split("/")))
+        if os.path.commonpath([self.root, path]) != self.root:
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def put_fileobj(self, key: str, fileobj: BinaryIO, content_type: Optional[str] = None):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb+") as f:
+            shutil.copyfileobj(fileobj, f)
+
+    def put_file(self, key: str, path: str):
+        dest = self._path(key)
+        if os.path.abspath(path) == dest:
+            return
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.copy(path, dest)
+
+    def get_bytes(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as f:
+            return f.read()
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self._path(key))
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(self._path(key))
+
+    def list(self, prefix: str) -> List[str]:
+        base = self._path(prefix)
+        keys = []
+        for dirpath, _, filenames in os.walk(base):
+            for name in filenames:
+                rel = os.path.relpath(os.path.join(dirpath, name), self.root)
+                keys.append(rel.replace(os.sep, "/"))
+        return sorted(keys)
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def url(self, key: str) -> str:
+        return f"{self.static_url}/{key}"
+
+    def cached_path(self, key: str) -> str:
+        path = self._path(key)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
+        return path
+
+    def work_dir(self, *parts: str) -> str:
+        path = self._path("/".join(parts))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+
+class S3Storage(Storage):
+    """
+    S3-compatible object storage (AWS S3, MinIO).
+
+    Server-side uploads use boto3 managed transfers, which switch to multipart
+    above MULTIPART_PART_SIZE. Browsers upload and download directly through
+    presigned URLs signed against public_endpoint (the host they can reach,
+    which may differ from the in-cluster endpoint). Reads that need a real
+    file go through a local cache validated by ETag.
+    """
+
+    supports_presigned = True
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        access_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        region: Optional[str] = None,
+        public_endpoint_url: Optional[str] = None,
+        cache_dir: str = STORAGE_CACHE_PATH,
+        cache_max_bytes: int = STORAGE_CACHE_MAX_BYTES,
+        client=None,
+        presign_client=None,
+    ):
+        self.bucket = bucket
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.cache_max_bytes = cache_max_bytes
+        # Approximate bytes under cache_dir/objects; None until the first scan
+        self._cache_bytes: Optional[int] = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        if client is None or (presign_client is None and public_endpoint_url):
+            import boto3
+            from botocore.config import Config
+
+            def make_client(endpoint):
+                return boto3.client(
+                    "s3",
+                    endpoint_url=endpoint,
+                    aws_access_key_id=access_key,
+                    aws_secret_access_key=secret_key,
+                    region_name=region or "us-east-1",
+                    config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+                )
+
+            if client is None:
+                client = make_client(endpoint_url)
+            if presign_client is None and public_endpoint_url:
+                presign_client = make_client(public_endpoint_url)
+
+        self.client = client
+        self.presign_client = presign_client or client
+
+        # One lock per cache key so concurrent requests don't race on the same file
+        self._cache_locks: Dict[str, threading.Lock] = {}
+        self._cache_locks_guard = threading.Lock()
+
+        from boto3.s3.transfer import TransferConfig
+        self.transfer_config = TransferConfig(
+            multipart_threshold=MULTIPART_PART_SIZE,
+            multipart_chunksize=MULTIPART_PART_SIZE,
+        )
+
+    def ensure_bucket(self):
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_bucket(Bucket=self.bucket)
+        except ClientError as e:
+            if not (self._is_missing(e) or e.response.get("Error", {}).get("Code") == "NoSuchBucket"):
+                raise
+            self.client.create_bucket(Bucket=self.bucket)
+
+    @staticmethod
+    def _is_missing(error) -> bool:
+        code = error.response.get("Error", {}).get("Code")
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    def _head(self, key: str) -> dict:
+        from botocore.exceptions import ClientError
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if self._is_missing(e):
+                raise FileNotFoundError(key) from e
+            raise
+
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None):
+        extra = {"ContentType": content_type} if content_type else {}
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data, **extra)
+
+    def put_fileobj(self, key: str, fileobj: BinaryIO, content_type: Optional[str] = None):
+        extra = {"ContentType": content_type} if content_type else None
+        self.client.upload_fileobj(
+            fileobj, self.bucket, key, ExtraArgs=extra, Config=self.transfer_config
+        )
+
+    def put_file(self, key: str, path: str):
+        self.client.upload_file(path, self.bucket, key, Config=self.transfer_config)
+
+    def get_bytes(self, key: str) -> bytes:
+        from botocore.exceptions import ClientError
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if self._is_missing(e):
+                raise FileNotFoundError(key) from e
+            raise
+        return response["Body"].read()
+
+    def exists(self, key: str) -> bool:
+        try:
+            self._head(key)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def size(self, key: str) -> int:
+        return self._head(key)["ContentLength"]
+
+    def list(self, prefix: str) -> List[str]:
+        prefix = prefix.rstrip("/") + "/"
+        keys = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            keys.extend(obj["Key"] for obj in page.get("Contents", []))
+        return sorted(keys)
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def url(self, key: str) -> str:
+        return self.presign_client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=PRESIGN_EXPIRES,
+        )
+
+    def _cache_lock(self, key: str) -> threading.Lock:
+        with self._cache_locks_guard:
+            return self._cache_locks.setdefault(key, threading.Lock())
+
+    @staticmethod
+    def _replace_from_temp(path: str, write):
+        # Unique temp file in the target dir, then an atomic rename
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def cached_path(self, key: str) -> str:
+        head = self._head(key)
+        etag = head.get("ETag", "")
+
+        path = os.path.join(self.cache_dir, "objects", *key.split("/"))
+        etag_path = path + ".etag"
+
+        with self._cache_lock(key):
+            if os.path.isfile(path) and os.path.isfile(etag_path):
+                with open(etag_path, "r") as f:
+                    if f.read() == etag:
+                        # Bump mtime so eviction treats it as recently used
+                        os.utime(path)
+                        return path
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._replace_from_temp(
+                path,
+                lambda tmp: self.client.download_file(
+                    self.bucket, key, tmp, Config=self.transfer_config
+                ),
+            )
+
+            def write_etag(tmp):
+                with open(tmp, "w") as f:
+                    f.write(etag)
+
+            self._replace_from_temp(etag_path, write_etag)
+            size = os.path.getsize(path)
+
+        with self._cache_locks_guard:
+            if self._cache_bytes is not None:
+                self._cache_bytes += size
+            needs_scan = self._cache_bytes is None or self._cache_bytes > self.cache_max_bytes
+        if needs_scan:
+            self._evict_cache(keep=key)
+        return path
+
+    def _evict_cache(self, keep: str):
+        """
+        Deletes least recently used cached objects until the cache is back under
+        90% of cache_max_bytes, so a full scan isn't needed on every download.
+        """
+        target = int(self.cache_max_bytes * 0.9)
+        objects_dir = os.path.join(self.cache_dir, "objects")
+        entries = []
+        total = 0
+        for dirpath, _, filenames in os.walk(objects_dir):
+            for name in filenames:
+                if name.endswith((".etag", ".part")):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                key = os.path.relpath(path, objects_dir).replace(os.sep, "/")
+                entries.append((stat.st_mtime, stat.st_size, key, path))
+                total += stat.st_size
+
+        for _, size, key, path in sorted(entries):
+            if total <= target:
+                break
+            if key == keep:
+                continue
+            lock = self._cache_lock(key)
+            # Skip objects another request is downloading right now
+            if not lock.acquire(blocking=False):
+                continue
+            try:
+                for victim in (path + ".etag", path):
+                    try:
+                        os.remove(victim)
+                    except FileNotFoundError:
+                        pass
+                total -= size
+            finally:
+                lock.release()
+
+        with self._cache_locks_guard:
+            self._cache_bytes = total
+
+    def work_dir(self, *parts: str) -> str:
+        path = os.path.join(self.cache_dir, "work", *parts)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def presigned_put_url(self, key: str, content_type: Optional[str] = None) -> str:
+        params = {"Bucket": self.bucket, "Key": key}
+        if content_type:
+            params["ContentType"] = content_type
+        return self.presign_client.generate_presigned_url(
+            "put_object", Params=params, ExpiresIn=PRESIGN_EXPIRES
+        )
+
+    def create_multipart_upload(self, key: str, content_type: Optional[str] = None) -> str:
+        extra = {"ContentType": content_type} if content_type else {}
+        response = self.client.create_multipart_upload(Bucket=self.bucket, Key=key, **extra)
+        return response["UploadId"]
+
+    def presigned_part_url(self, key: str, upload_id: str, part_number: int) -> str:
+        return self.presign_client.generate_presigned_url(
+            "upload_part",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "UploadId": upload_id,
+                "PartNumber": part_number,
+            },
+            ExpiresIn=PRESIGN_EXPIRES,
+        )
+
+    def complete_multipart_upload(self, key: str, upload_id: str, parts: List[Dict]):
+        from botocore.exceptions import ClientError
+        try:
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={
+                    "Parts": [
+                        {"PartNumber": p["part_number"], "ETag": p["etag"]}
+                        for p in sorted(parts, key=lambda p: p["part_number"])
+                    ]
+                },
+            )
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code")
+            if code in ("InvalidPart", "InvalidPartOrder", "MalformedXML"):
+                # Parts are still stored; the client can resend the right list
+                raise UploadError(f"Invalid part list: {code}", recoverable=True) from e
+            if code == "NoSuchUpload":
+                raise UploadError("Upload does not exist", recoverable=False) from e
+            if code == "EntityTooSmall":
+                raise UploadError("Upload parts are too small", recoverable=False) from e
+            raise
+
+    def abort_multipart_upload(self, key: str, upload_id: str):
+        self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+
+
+def _with_scheme(endpoint: Optional[str]) -> Optional[str]:
+    # MINIO_ENDPOINT is given as host:port in docker-compose
+    if endpoint and "://" not in endpoint:
+        secure = os.getenv("MINIO_SECURE", "false").lower() == "true"
+        return f"{'https' if secure else 'http'}://{endpoint}"
+    return endpoint
+
+
+@lru_cache()
+def get_storage() -> Storage:
+    if STORAGE_BACKEND == "local":
+        return LocalStorage(STORAGE_PATH)
+
+    if STORAGE_BACKEND in ("s3", "minio"):
+        storage = S3Storage(
+            bucket=os.getenv("STORAGE_BUCKET", "opensight"),
+            endpoint_url=_with_scheme(os.getenv("MINIO_ENDPOINT")),
+            access_key=os.getenv("MINIO_ACCESS_KEY"),
+            secret_key=os.getenv("MINIO_SECRET_KEY"),
+            region=os.getenv("STORAGE_REGION"),
+            public_endpoint_url=_with_scheme(os.getenv("MINIO_PUBLIC_ENDPOINT")),
+        )
+        storage.ensure_bucket()
+        return storage
+
+    raise Exception(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
@@ -1,16 +1,16 @@
 import os
 import shutil
 import yaml
-import json
 from typing import List
+from ..storage import Storage, project_key
 
-def convert_to_yolo_format(project_id: str, storage_path: str, classes: List[str], image_map: dict):
+def convert_to_yolo_format(project_id: str, storage: Storage, classes: List[str], image_map: dict):
     """
     Converts project annotations to YOLO directory structure and format.
     image_map: dict mapping image_id -> filename (e.g. {'uuid1': 'uuid2.jpg'})
+    Images are read through the storage cache; the dataset is written to a local work dir.
     """
-    project_dir = os.path.join(storage_path, str(project_id))
-    dataset_dir = os.path.join(project_dir, "dataset")
+    dataset_dir = storage.work_dir(str(project_id), "dataset")
     
     # ... (cleanup code)
     if os.path.exists(dataset_dir):
@@ -27,37 +27,36 @@ def convert_to_yolo_format(project_id: str, storage_path: str, classes: List[str
     os.makedirs(val_images_dir, exist_ok=True)
     os.makedirs(val_labels_dir, exist_ok=True)
     
-    images_source_dir = os.path.join(project_dir, "images")
-    labels_source_dir = os.path.join(project_dir, "labels")
+    label_keys = [k for k in storage.list(project_key(project_id, "labels")) if k.endswith(".json")]
     
-    if not os.path.exists(labels_source_dir):
+    if not label_keys:
         print("No labels found.")
         return None
 
     # Map class names to IDs
     class_map = {name: idx for idx, name in enumerate(classes)}
     
-    files = [f for f in os.listdir(labels_source_dir) if f.endswith(".json")]
-    
     count = 0
-    for label_file in files:
-        image_id = label_file.replace(".json", "")
+    for label_key in label_keys:
+        image_id = label_key.rsplit("/", 1)[-1].replace(".json", "")
         
         # Use provided map to find filename
         image_filename = image_map.get(image_id)
         
-        if not image_filename or not os.path.exists(os.path.join(images_source_dir, image_filename)):
+        try:
+            if not image_filename:
+                raise FileNotFoundError(image_id)
+            src_img_path = storage.cached_path(project_key(project_id, "images", image_filename))
+        except FileNotFoundError:
             print(f"Image not found for ID {image_id}")
             continue
             
         # Copy Image to Train AND Val
-        src_img_path = os.path.join(images_source_dir, image_filename)
         shutil.copy(src_img_path, os.path.join(train_images_dir, image_filename))
         shutil.copy(src_img_path, os.path.join(val_images_dir, image_filename))
         
         # ... (rest of logic: read annotations, normalize, write txt)
-        with open(os.path.join(labels_source_dir, label_file), 'r') as f:
-            annotations = json.load(f)
+        annotations = storage.read_json(label_key)
             
         yolo_lines = []
         
@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# app.database refuses to import without a DATABASE_URL; tests swap in SQLite
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from moto import mock_aws  # noqa: E402
+
+from app.storage import LocalStorage, S3Storage  # noqa: E402
+
+
+@pytest.fixture
+def local_storage(tmp_path):
+    return LocalStorage(str(tmp_path / "data"))
+
+
+@pytest.fixture
+def s3_storage(tmp_path, monkeypatch):
+    # In-process S3 stand-in; point endpoint_url at a MinIO instead to run against it
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        import boto3
+
+        storage = S3Storage(
+            "opensight-test",
+            client=boto3.client("s3", region_name="us-east-1"),
+            cache_dir=str(tmp_path / "cache"),
+        )
+        storage.ensure_bucket()
+        yield storage
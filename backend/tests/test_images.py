@@ -0,0 +1,187 @@
+import uuid
+
+import pytest
+import requests
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models
+from app.database import Base, get_db
+from app.routers import images
+from app.storage import get_storage
+
+
+# The models use the PostgreSQL UUID type; let SQLite store it as text and,
+# like PostgreSQL, accept the string ids the routers pass in queries
+@compiles(UUID, "sqlite")
+def compile_uuid_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+@pytest.fixture(autouse=True)
+def coerce_uuid_strings(monkeypatch):
+    bind_processor = UUID.bind_processor
+
+    def coercing_bind_processor(self, dialect):
+        process = bind_processor(self, dialect)
+        if process is None:
+            return None
+        return lambda value: process(uuid.UUID(value) if isinstance(value, str) else value)
+
+    monkeypatch.setattr(UUID, "bind_processor", coercing_bind_processor)
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def project_id(session_factory):
+    db = session_factory()
+    project = models.Project(name="Cars")
+    db.add(project)
+    db.commit()
+    project_id = str(project.id)
+    db.close()
+    return project_id
+
+
+def make_client(session_factory, storage):
+    app = FastAPI()
+    app.include_router(images.router)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_storage] = lambda: storage
+    return TestClient(app)
+
+
+def test_local_backend_falls_back_to_api_upload(session_factory, project_id, local_storage):
+    client = make_client(session_factory, local_storage)
+
+    ticket = client.post(f"/projects/{project_id}/images/uploads", json={"filename": "car.jpg"}).json()
+    assert ticket["direct"] is False
+
+    response = client.post(
+        f"/projects/{project_id}/images", files={"file": ("car.jpg", b"jpeg-bytes", "image/jpeg")}
+    )
+    assert response.status_code == 200
+    image = response.json()
+    assert image["file_size"] == len(b"jpeg-bytes")
+    assert local_storage.get_bytes(f"{project_id}/images/{image['file_path']}") == b"jpeg-bytes"
+
+
+def test_direct_upload(session_factory, project_id, s3_storage):
+    client = make_client(session_factory, s3_storage)
+
+    ticket = client.post(
+        f"/projects/{project_id}/images/uploads",
+        json={"filename": "car.jpg", "content_type": "image/jpeg", "file_size": 10},
+    ).json()
+    assert ticket["direct"] is True
+    assert ticket["upload_id"] is None
+
+    put = requests.put(ticket["url"], data=b"jpeg-bytes", headers={"Content-Type": "image/jpeg"})
+    assert put.status_code == 200
+
+    complete = {"filename": "car.jpg", "file_path": ticket["file_path"]}
+    response = client.post(f"/projects/{project_id}/images/uploads/complete", json=complete)
+    assert response.status_code == 200
+    assert response.json()["file_size"] == 10
+
+    # The same object can't be registered twice
+    response = client.post(f"/projects/{project_id}/images/uploads/complete", json=complete)
+    assert response.status_code == 409
+
+    file_response = client.get(
+        f"/projects/{project_id}/images/{uuid.uuid4()}/file", follow_redirects=False
+    )
+    assert file_response.status_code == 404
+
+
+def test_direct_multipart_upload(session_factory, project_id, s3_storage, monkeypatch):
+    monkeypatch.setattr(images, "MULTIPART_PART_SIZE", 5 * 1024 * 1024)
+    client = make_client(session_factory, s3_storage)
+    data = b"a" * (5 * 1024 * 1024) + b"tail"
+
+    ticket = client.post(
+        f"/projects/{project_id}/images/uploads",
+        json={"filename": "big.png", "file_size": len(data)},
+    ).json()
+    assert ticket["upload_id"]
+    assert len(ticket["part_urls"]) == 2
+
+    parts = []
+    for number, url in enumerate(ticket["part_urls"], start=1):
+        chunk = data[(number - 1) * ticket["part_size"]:number * ticket["part_size"]]
+        put = requests.put(url, data=chunk)
+        assert put.status_code == 200
+        parts.append({"part_number": number, "etag": put.headers["ETag"]})
+
+    complete = {"filename": "big.png", "file_path": ticket["file_path"], "upload_id": ticket["upload_id"]}
+
+    # A bad ETag is rejected but keeps the parts so the client can retry
+    bad_parts = [dict(parts[0], etag='"bogus"'), parts[1]]
+    response = client.post(
+        f"/projects/{project_id}/images/uploads/complete", json=dict(complete, parts=bad_parts)
+    )
+    assert response.status_code == 400
+
+    response = client.post(
+        f"/projects/{project_id}/images/uploads/complete", json=dict(complete, parts=parts)
+    )
+    assert response.status_code == 200
+    image = response.json()
+    assert image["file_size"] == len(data)
+
+    file_response = client.get(
+        f"/projects/{project_id}/images/{image['id']}/file", follow_redirects=False
+    )
+    assert file_response.status_code == 307
+    assert requests.get(file_response.headers["location"]).content == data
+
+
+def test_abort_multipart_upload(session_factory, project_id, s3_storage, monkeypatch):
+    monkeypatch.setattr(images, "MULTIPART_PART_SIZE", 5 * 1024 * 1024)
+    client = make_client(session_factory, s3_storage)
+
+    ticket = client.post(
+        f"/projects/{project_id}/images/uploads",
+        json={"filename": "big.png", "file_size": 6 * 1024 * 1024},
+    ).json()
+    response = client.post(
+        f"/projects/{project_id}/images/uploads/abort",
+        json={"file_path": ticket["file_path"], "upload_id": ticket["upload_id"]},
+    )
+    assert response.status_code == 200
+
+    uploads = s3_storage.client.list_multipart_uploads(Bucket=s3_storage.bucket)
+    assert not uploads.get("Uploads")
+
+
+@pytest.mark.parametrize("file_path", ["../other/x.jpg", "not-a-uuid.jpg", f"{uuid.uuid4()}/x.jpg"])
+def test_complete_rejects_unissued_names(session_factory, project_id, s3_storage, file_path):
+    client = make_client(session_factory, s3_storage)
+    s3_storage.put_bytes(f"{project_id}/images/not-a-uuid.jpg", b"x")
+
+    response = client.post(
+        f"/projects/{project_id}/images/uploads/complete",
+        json={"filename": "x.jpg", "file_path": file_path},
+    )
+    assert response.status_code == 400
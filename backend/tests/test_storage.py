@@ -0,0 +1,136 @@
+import io
+import os
+
+import pytest
+import requests
+
+from app.storage import MULTIPART_PART_SIZE, UploadError
+
+
+def test_local_round_trip(local_storage):
+    local_storage.write_json("p1/classes.json", ["car", "person"])
+    local_storage.put_bytes("p1/images/a.jpg", b"abc")
+
+    assert local_storage.read_json("p1/classes.json") == ["car", "person"]
+    assert local_storage.get_bytes("p1/images/a.jpg") == b"abc"
+    assert local_storage.size("p1/images/a.jpg") == 3
+    assert local_storage.exists("p1/images/a.jpg")
+    assert local_storage.url("p1/images/a.jpg") == "/static/p1/images/a.jpg"
+    assert local_storage.cached_path("p1/images/a.jpg") == os.path.join(local_storage.root, "p1", "images", "a.jpg")
+
+    local_storage.delete("p1/images/a.jpg")
+    assert not local_storage.exists("p1/images/a.jpg")
+    with pytest.raises(FileNotFoundError):
+        local_storage.get_bytes("p1/images/a.jpg")
+
+
+def test_local_list(local_storage):
+    local_storage.put_bytes("p1/labels/1.json", b"[]")
+    local_storage.put_bytes("p1/labels/2.json", b"[]")
+    local_storage.put_bytes("p2/labels/3.json", b"[]")
+
+    assert local_storage.list("p1/labels") == ["p1/labels/1.json", "p1/labels/2.json"]
+    assert local_storage.list("p3") == []
+
+
+@pytest.mark.parametrize("key", ["../outside.txt", "p1/../../outside.txt"])
+def test_local_rejects_keys_outside_root(local_storage, key):
+    with pytest.raises(ValueError):
+        local_storage.put_bytes(key, b"x")
+    with pytest.raises(ValueError):
+        local_storage.get_bytes(key)
+
+
+def test_s3_round_trip(s3_storage):
+    s3_storage.write_json("p1/labels/1.json", [{"id": "a"}])
+
+    assert s3_storage.read_json("p1/labels/1.json") == [{"id": "a"}]
+    assert s3_storage.list("p1/labels") == ["p1/labels/1.json"]
+    assert s3_storage.list("p1/images") == []
+
+
+def test_s3_missing_key_raises_file_not_found(s3_storage):
+    with pytest.raises(FileNotFoundError):
+        s3_storage.get_bytes("p1/images/missing.jpg")
+    with pytest.raises(FileNotFoundError):
+        s3_storage.size("p1/images/missing.jpg")
+    with pytest.raises(FileNotFoundError):
+        s3_storage.cached_path("p1/images/missing.jpg")
+    assert not s3_storage.exists("p1/images/missing.jpg")
+
+
+def test_s3_put_fileobj_uses_multipart_above_part_size(s3_storage):
+    data = os.urandom(MULTIPART_PART_SIZE + 1024)
+    s3_storage.put_fileobj("p1/images/big.bin", io.BytesIO(data))
+
+    head = s3_storage.client.head_object(Bucket=s3_storage.bucket, Key="p1/images/big.bin")
+    # Multipart objects get an ETag of the form "<md5>-<part count>"
+    assert head["ETag"].strip('"').endswith("-2")
+    assert s3_storage.size("p1/images/big.bin") == len(data)
+    assert s3_storage.get_bytes("p1/images/big.bin") == data
+
+
+def test_s3_cached_path_invalidated_by_etag(s3_storage):
+    s3_storage.put_bytes("p1/images/a.jpg", b"first")
+    path = s3_storage.cached_path("p1/images/a.jpg")
+    with open(path, "rb") as f:
+        assert f.read() == b"first"
+    assert s3_storage.cached_path("p1/images/a.jpg") == path
+
+    s3_storage.put_bytes("p1/images/a.jpg", b"second")
+    path = s3_storage.cached_path("p1/images/a.jpg")
+    with open(path, "rb") as f:
+        assert f.read() == b"second"
+
+
+def test_s3_cache_evicts_least_recently_used(s3_storage):
+    s3_storage.cache_max_bytes = 2500
+    for i in range(4):
+        s3_storage.put_bytes(f"p1/images/{i}.jpg", b"x" * 1000)
+        path = s3_storage.cached_path(f"p1/images/{i}.jpg")
+        # Make the access order explicit instead of relying on clock resolution
+        os.utime(path, (i, i))
+
+    cached = sorted(os.listdir(os.path.dirname(path)))
+    assert "0.jpg" not in cached
+    assert "3.jpg" in cached
+
+
+def test_s3_multipart_upload(s3_storage):
+    key = "p1/images/multi.bin"
+    chunks = [os.urandom(5 * 1024 * 1024), b"tail"]
+
+    upload_id = s3_storage.create_multipart_upload(key, content_type="application/octet-stream")
+    parts = []
+    for number, chunk in enumerate(chunks, start=1):
+        response = s3_storage.client.upload_part(
+            Bucket=s3_storage.bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=chunk
+        )
+        parts.append({"part_number": number, "etag": response["ETag"]})
+    s3_storage.complete_multipart_upload(key, upload_id, parts)
+
+    assert s3_storage.get_bytes(key) == b"".join(chunks)
+
+
+def test_s3_multipart_bad_etag_is_recoverable(s3_storage):
+    key = "p1/images/multi.bin"
+    upload_id = s3_storage.create_multipart_upload(key)
+    response = s3_storage.client.upload_part(
+        Bucket=s3_storage.bucket, Key=key, UploadId=upload_id, PartNumber=1, Body=b"only"
+    )
+
+    with pytest.raises(UploadError) as excinfo:
+        s3_storage.complete_multipart_upload(key, upload_id, [{"part_number": 1, "etag": '"bogus"'}])
+    assert excinfo.value.recoverable
+
+    # The parts survived, so retrying with the right ETag succeeds
+    s3_storage.complete_multipart_upload(key, upload_id, [{"part_number": 1, "etag": response["ETag"]}])
+    assert s3_storage.get_bytes(key) == b"only"
+
+
+def test_s3_presigned_put(s3_storage):
+    url = s3_storage.presigned_put_url("p1/images/direct.jpg", content_type="image/jpeg")
+    response = requests.put(url, data=b"image-bytes", headers={"Content-Type": "image/jpeg"})
+
+    assert response.status_code == 200
+    assert s3_storage.get_bytes("p1/images/direct.jpg") == b"image-bytes"
@@ -84,7 +84,7 @@ export default function AnnotationPage({ params }: { params: Promise<{ id: strin
                     setProjectImages(project.images);
                     const img = project.images.find((i: any) => i.id === imageId);
                     if (img) {
-                        setImagePath(`${API_URL}/static/${id}/images/${img.file_path}`);
+                        setImagePath(`${API_URL}/projects/${id}/images/${img.id}/file`);
                     }
                 }
 
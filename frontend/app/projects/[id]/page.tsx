@@ -18,7 +18,7 @@ interface Project {
     images: Image[];
 }
 
-import { API_URL } from "@/lib/utils";
+import { API_URL, uploadImage } from "@/lib/utils";
 
 export default function ProjectDetail({ params }: { params: Promise<{ id: string }> }) {
     // Unwrap params using React.use()
@@ -56,14 +56,10 @@ export default function ProjectDetail({ params }: { params: Promise<{ id: string
         if (!e.target.files || e.target.files.length === 0) return;
         setUploading(true);
 
-        const formData = new FormData();
-        formData.append("file", e.target.files[0]);
+        const file = e.target.files[0];
 
         try {
-            const res = await fetch(`${API_URL}/projects/${id}/images`, {
-                method: "POST",
-                body: formData,
-            });
+            const res = await uploadImage(id, file);
             if (res.ok) {
                 fetchProject();
             }
@@ -193,7 +189,7 @@ export default function ProjectDetail({ params }: { params: Promise<{ id: string
                         >
                             <Link href={`/projects/${id}/images/${img.id}`} className="block w-full h-full relative">
                                 <img
-                                    src={`http://localhost:8000/static/${id}/images/${img.file_path}`}
+                                    src={`${API_URL}/projects/${id}/images/${img.id}/file`}
                                     alt={img.filename}
                                     className="w-full h-full object-cover group-hover:scale-110 transition-transform duration-300"
                                 />
@@ -6,3 +6,62 @@ export function cn(...inputs: ClassValue[]) {
 }
 
 export const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
+
+// Uploads an image straight to object storage via presigned URLs when the backend
+// supports it, otherwise falls back to posting the file through the API.
+export async function uploadImage(projectId: string, file: File): Promise<Response> {
+    const ticketRes = await fetch(`${API_URL}/projects/${projectId}/images/uploads`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ filename: file.name, content_type: file.type || null, file_size: file.size }),
+    });
+    if (!ticketRes.ok) return ticketRes;
+    const ticket = await ticketRes.json();
+
+    if (!ticket.direct) {
+        const formData = new FormData();
+        formData.append("file", file);
+        return fetch(`${API_URL}/projects/${projectId}/images`, {
+            method: "POST",
+            body: formData,
+        });
+    }
+
+    const parts: { part_number: number; etag: string }[] = [];
+    if (ticket.upload_id) {
+        try {
+            for (let i = 0; i < ticket.part_urls.length; i++) {
+                const chunk = file.slice(i * ticket.part_size, (i + 1) * ticket.part_size);
+                const partRes = await fetch(ticket.part_urls[i], { method: "PUT", body: chunk });
+                if (!partRes.ok) throw new Error(`Upload of part ${i + 1} failed`);
+                parts.push({ part_number: i + 1, etag: partRes.headers.get("ETag") || "" });
+            }
+        } catch (error) {
+            // Release the parts already stored for this upload
+            await fetch(`${API_URL}/projects/${projectId}/images/uploads/abort`, {
+                method: "POST",
+                headers: { "Content-Type": "application/json" },
+                body: JSON.stringify({ file_path: ticket.file_path, upload_id: ticket.upload_id }),
+            }).catch(() => undefined);
+            throw error;
+        }
+    } else {
+        const putRes = await fetch(ticket.url, {
+            method: "PUT",
+            headers: file.type ? { "Content-Type": file.type } : undefined,
+            body: file,
+        });
+        if (!putRes.ok) throw new Error("Upload to storage failed");
+    }
+
+    return fetch(`${API_URL}/projects/${projectId}/images/uploads/complete`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({
+            filename: file.name,
+            file_path: ticket.file_path,
+            upload_id: ticket.upload_id,
+            parts,
+        }),
+    });
+}